@@ -1,10 +1,15 @@
 import streamlit as st
 import yfinance as yf
+from yfinance.scrapers.quote import FastInfo
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+import orjson
+from requests.adapters import HTTPAdapter
+from lxml import etree, html as lxml_html
 from datetime import datetime, timedelta
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import deque
 import plotly.graph_objects as go
 import numpy as np
 import pytz
@@ -17,6 +22,36 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Theme CSS
+DARK_CSS = """
+<style>
+.stApp {
+    background-color: #000000;
+    color: #e0e0e0;
+}
+</style>
+"""
+
+LIGHT_CSS = """
+<style>
+.stApp {
+    background-color: #f0f0f0;
+    color: #000000;
+}
+/* Force black text for common elements in Light Mode */
+.stMarkdown, .stText, .stMetricLabel, .stMetricValue, .stDataFrame, .stTable, .stRadio label, .stSelectbox label, p, span, div {
+    color: #000000 !important;
+}
+/* Sidebar background */
+[data-testid="stSidebar"] {
+    background-color: #e0e0e0;
+}
+[data-testid="stSidebar"] * {
+    color: #000000 !important;
+}
+</style>
+"""
+
 # --- Core Logic ---
 class BankRateFetcher:
     def __init__(self):
@@ -30,26 +65,35 @@ class BankRateFetcher:
             'GBP': '英镑',
             'JPY': '日元'
         }
+        # Keep-alive session so repeated polls reuse the TCP/TLS connection
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        self.session.mount("https://www.boc.cn/", adapter)
+        self.session.mount("https://fx.cmbchina.com/", adapter)
+        # Row lookup per currency, matched on the first (name) cell of the BOC table
+        self.boc_row_xpath = {
+            code: etree.XPath(f'//tr[contains(normalize-space(td[1]), "{name}")]')
+            for code, name in self.currency_map.items()
+        }
 
-    def get_boc_rates(self, currency_code):
+    def get_all_boc_rates(self):
+        # One BOC page lists every currency, so parse it once and pick out all rows
         try:
             url = "https://www.boc.cn/sourcedb/whpj/"
-            response = requests.get(url, headers=self.headers, timeout=5)
-            response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
-            target_name = self.currency_map.get(currency_code)
-            if not target_name: return None
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cols = row.find_all('td')
-                    if len(cols) > 0 and target_name in cols[0].text.strip():
-                        return {'spot_sell': cols[3].text.strip(), 'cash_sell': cols[4].text.strip()}
-            return None
-        except: return None
-
-    def get_cmb_rates(self, currency_code):
+            response = self.session.get(url, timeout=5)
+            doc = lxml_html.fromstring(response.content)
+            rates = {}
+            for code, row_xpath in self.boc_row_xpath.items():
+                rows = row_xpath(doc)
+                if rows:
+                    cols = rows[0].findall('td')
+                    rates[code] = {'spot_sell': cols[3].text_content().strip(), 'cash_sell': cols[4].text_content().strip()}
+            return rates
+        except: return {}
+
+    def get_all_cmb_rates(self):
+        # The CMB API lists every currency in one body, so map all of them from a single response
         try:
             url = "https://fx.cmbchina.com/api/v1/fx/rate"
             headers = {
@@ -57,16 +101,17 @@ class BankRateFetcher:
                 'Referer': 'https://fx.cmbchina.com/hq/',
                 'Origin': 'https://fx.cmbchina.com'
             }
-            response = requests.get(url, headers=headers, timeout=5)
-            if response.status_code != 200: return None
-            data = response.json()
-            target_name = self.currency_map.get(currency_code)
-            if 'body' in data:
-                for item in data['body']:
-                    if target_name in item.get('ccyNbr', ''):
-                        return {'spot_sell': item.get('rthOfr', 'N/A'), 'cash_sell': item.get('rtcOfr', 'N/A')}
-            return None
-        except: return None
+            response = self.session.get(url, headers=headers, timeout=5)
+            if response.status_code != 200: return {}
+            body = orjson.loads(response.content).get('body', [])
+            rates = {}
+            for code, target_name in self.currency_map.items():
+                # First body entry whose ccyNbr contains the currency's Chinese name
+                item = next((item for item in body if target_name in item.get('ccyNbr', '')), None)
+                if item:
+                    rates[code] = {'spot_sell': item.get('rthOfr', 'N/A'), 'cash_sell': item.get('rtcOfr', 'N/A')}
+            return rates
+        except: return {}
 
 # --- Streamlit UI ---
 
@@ -145,54 +190,39 @@ selected_theme = st.sidebar.radio("Theme", list(theme_map.keys()), index=0)
 
 # Apply Theme Colors (CSS & Chart)
 if selected_theme == 'Dark':
-    st.markdown(
-        """
-        <style>
-        .stApp {
-            background-color: #000000;
-            color: #e0e0e0;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(DARK_CSS, unsafe_allow_html=True)
     chart_bg = '#000000'
     chart_grid = '#404040'
     chart_font_color = '#e0e0e0'
 else:
-    st.markdown(
-        """
-        <style>
-        .stApp {
-            background-color: #f0f0f0;
-            color: #000000;
-        }
-        /* Force black text for common elements in Light Mode */
-        .stMarkdown, .stText, .stMetricLabel, .stMetricValue, .stDataFrame, .stTable, .stRadio label, .stSelectbox label, p, span, div {
-            color: #000000 !important;
-        }
-        /* Sidebar background */
-        [data-testid="stSidebar"] {
-            background-color: #e0e0e0;
-        }
-        [data-testid="stSidebar"] * {
-            color: #000000 !important;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(LIGHT_CSS, unsafe_allow_html=True)
     chart_bg = '#f0f0f0'
     chart_grid = '#d0d0d0'
     chart_font_color = '#000000'
 
 # Initialize Session State
+def new_live_data():
+    # Keep buffer size reasonable (e.g., 1 hour of seconds); maxlen evicts the oldest point in O(1)
+    # 'min'/'max' track the extremes of 'rates' so the y-range needs no rescan
+    return {'times': deque(maxlen=3600), 'rates': deque(maxlen=3600), 'min': None, 'max': None}
+
+def append_live_point(live, t, rate):
+    """Appends a live tick and keeps the running min/max of the buffer current."""
+    rates = live['rates']
+    evicted = rates[0] if len(rates) == rates.maxlen else None
+    live['times'].append(t)
+    rates.append(rate)
+    if evicted is not None and evicted in (live['min'], live['max']):
+        # The dropped point was an extreme: rescan once
+        live['min'], live['max'] = min(rates), max(rates)
+    else:
+        live['min'] = rate if live['min'] is None else min(live['min'], rate)
+        live['max'] = rate if live['max'] is None else max(live['max'], rate)
+
 if 'live_data' not in st.session_state:
-    st.session_state.live_data = {'times': [], 'rates': []}
-if 'bank_rates' not in st.session_state:
-    st.session_state.bank_rates = {'BOC': None, 'CMB': None}
-if 'last_bank_update' not in st.session_state:
-    st.session_state.last_bank_update = {'BOC': 0, 'CMB': 0}
+    st.session_state.live_data = new_live_data()
+if 'last_price_fallback' not in st.session_state:
+    st.session_state.last_price_fallback = 0
 if 'last_currency' not in st.session_state:
     st.session_state.last_currency = selected_currency
 if 'last_range' not in st.session_state:
@@ -200,18 +230,16 @@ if 'last_range' not in st.session_state:
 
 # Reset live data if currency changes
 if st.session_state.last_currency != selected_currency:
-    st.session_state.live_data = {'times': [], 'rates': []}
-    st.session_state.bank_rates = {'BOC': None, 'CMB': None}
-    st.session_state.last_bank_update = {'BOC': 0, 'CMB': 0}
+    st.session_state.live_data = new_live_data()
     st.session_state.last_currency = selected_currency
 
 # Reset live data if time range changes
 if st.session_state.last_range != selected_range:
-    st.session_state.live_data = {'times': [], 'rates': []}
+    st.session_state.live_data = new_live_data()
     st.session_state.last_range = selected_range
 
 # Fetch History (Cached)
-@st.cache_data(ttl=60)
+@st.cache_data(ttl=60, max_entries=16, show_spinner=False)
 def get_history(ticker, period, interval):
     try:
         data = yf.Ticker(ticker).history(period=period, interval=interval)
@@ -219,6 +247,28 @@ def get_history(ticker, period, interval):
     except:
         return pd.DataFrame()
 
+# Shared API clients (Cached, reused across reruns and sessions)
+@st.cache_resource
+def get_ticker(ticker):
+    return yf.Ticker(ticker)
+
+@st.cache_resource
+def get_fetcher():
+    return BankRateFetcher()
+
+# Bank rates for every currency (Shared across reruns and sessions, so a currency switch is a dict lookup)
+# CMB's TTL sits below the 20s fragment period so every run refreshes it
+BANK_TABLE_TTL = {'BOC': 30, 'CMB': 15}
+
+@st.cache_resource
+def get_bank_tables():
+    return {source: {'fetch_time': 0, 'table': {}} for source in BANK_TABLE_TTL}
+
+@st.cache_resource
+def get_bank_executor():
+    # BOC and CMB are independent I/O-bound calls, so they can run side by side
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix='bank-rates')
+
 ticker_symbol = currency_info['yf']
 range_cfg = time_ranges[selected_range]
 hist_data = get_history(ticker_symbol, range_cfg['period'], range_cfg['interval'])
@@ -264,97 +314,147 @@ if not hist_data.empty:
     else:
         hist_data = hist_data[hist_data.index >= cutoff_time]
 
-# Placeholders
-title_placeholder = st.empty()
-metrics_placeholder = st.empty()
-chart_placeholder = st.empty()
-footer_placeholder = st.empty()
+MAX_HISTORY_POINTS = 500
 
-fetcher = BankRateFetcher()
+# History only changes on a full rerun, so pull out what the live ticks need once
+hist_close = None
+hist_times, hist_rates = [], []
+if not hist_data.empty:
+    hist_close = hist_data['Close'].to_numpy()
+    hist_start, hist_end = float(hist_close[0]), float(hist_close[-1])
+    hist_min, hist_max = float(hist_close.min()), float(hist_close.max())
+    # Plot at most MAX_HISTORY_POINTS evenly spaced points (first and last kept) to keep the chart payload small
+    plot_idx = slice(None)
+    if len(hist_close) > MAX_HISTORY_POINTS:
+        plot_idx = np.linspace(0, len(hist_close) - 1, MAX_HISTORY_POINTS, dtype=int)
+    hist_times = hist_data.index[plot_idx].tolist()
+    hist_rates = hist_close[plot_idx].tolist()
+
+fetcher = get_fetcher()
+bank_tables = get_bank_tables()
+bank_table_fetchers = {'BOC': fetcher.get_all_boc_rates, 'CMB': fetcher.get_all_cmb_rates}
+
+def refresh_bank_table(source):
+    """Refetches one bank's table into the shared cache (runs on the pool)."""
+    table = bank_table_fetchers[source]()
+    if table:
+        bank_tables[source]['table'] = table
+
+def refresh_bank_tables_in_background(current_time):
+    """Submits a pool refresh for every expired bank table, so the chart refresh never waits on it."""
+    futures = []
+    for source, cache in bank_tables.items():
+        if current_time - cache['fetch_time'] >= BANK_TABLE_TTL[source]:
+            cache['fetch_time'] = current_time
+            futures.append(get_bank_executor().submit(refresh_bank_table, source))
+    return futures
+
+# Chart (built once per run; the live loop only refreshes the trace)
+# Determine Colors based on Theme
+if selected_theme == 'Dark':
+    c_up, c_down = '#ff3333', '#00ff00'
+    f_up, f_down = 'rgba(255, 50, 50, 0.2)', 'rgba(0, 255, 0, 0.2)'
+elif selected_theme == 'Light':
+    c_up, c_down = '#d62728', '#2ca02c' # Plotly standard red/green
+    f_up, f_down = 'rgba(214, 39, 40, 0.2)', 'rgba(44, 160, 44, 0.2)'
+
+# One 'Rate' trace; the loop fills it with history + live points
+fig = go.Figure(go.Scatter(
+    x=[],
+    y=[],
+    mode='lines',
+    name='Rate',
+    line=dict(width=2),
+    fill='tozeroy'
+))
+fig.update_layout(
+    title=dict(text=f"<b>Exchange Rate Trend ({selected_range})</b>", font=dict(color=chart_font_color)),
+    xaxis=dict(
+        title="<b>Time</b>", 
+        title_font=dict(color=chart_font_color), 
+        tickfont=dict(color=chart_font_color), 
+        gridcolor=chart_grid,
+        showspikes=True,
+        spikemode='across',
+        spikesnap='cursor',
+        showline=True,
+        spikecolor=chart_font_color,
+        spikethickness=1
+    ),
+    yaxis=dict(title="<b>CNY</b>", title_font=dict(color=chart_font_color), tickfont=dict(color=chart_font_color), tickformat=".4f", gridcolor=chart_grid),
+    showlegend=False,
+    hovermode="x",
+    height=500,
+    template=theme_map[selected_theme],
+    paper_bgcolor=chart_bg,
+    plot_bgcolor=chart_bg,
+    font=dict(color=chart_font_color),
+    margin=dict(l=0, r=0, t=30, b=0),
+    uirevision=f"{selected_currency}_{selected_range}"
+)
+st.session_state.fig = fig
 
-# Live Loop
-while True:
+# Live Update (only this fragment reruns on the timer; sidebar, CSS and history stay put)
+@st.fragment(run_every=20)
+def live_update():
     current_time = time.time()
     
     # 1. Fetch Live Rate (Yahoo)
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        price = ticker.fast_info.last_price
+        ticker = get_ticker(ticker_symbol)
+        # Fresh FastInfo per tick: Ticker.fast_info memoizes last_price on the cached Ticker
+        price = FastInfo(ticker).last_price
         if price is None or np.isnan(price):
-             # Fallback
-             hist = ticker.history(period='1d', interval='1m')
-             if not hist.empty:
-                 price = hist['Close'].iloc[-1]
+            price = None
+            # Fallback (extra network call, so at most once a minute; otherwise the last known rate is shown)
+            if current_time - st.session_state.last_price_fallback > 60:
+                st.session_state.last_price_fallback = current_time
+                hist = ticker.history(period='1d', interval='1m')
+                if not hist.empty:
+                    price = hist['Close'].iloc[-1]
     except:
         price = None
 
     if price:
         # Store as UTC aware datetime to avoid ambiguity
-        st.session_state.live_data['times'].append(datetime.now(pytz.utc))
-        st.session_state.live_data['rates'].append(price)
-        # Keep buffer size reasonable (e.g., 1 hour of seconds)
-        if len(st.session_state.live_data['times']) > 3600:
-            st.session_state.live_data['times'].pop(0)
-            st.session_state.live_data['rates'].pop(0)
-
-    # 2. Fetch Bank Rates (Throttled)
-    # BOC (30s)
-    if current_time - st.session_state.last_bank_update['BOC'] > 30:
-        rate = fetcher.get_boc_rates(selected_currency)
-        if rate:
-            st.session_state.bank_rates['BOC'] = rate
-        st.session_state.last_bank_update['BOC'] = current_time
-    
-    # CMB (20s)
-    if current_time - st.session_state.last_bank_update['CMB'] > 20:
-        rate = fetcher.get_cmb_rates(selected_currency)
-        if rate:
-            st.session_state.bank_rates['CMB'] = rate
-        st.session_state.last_bank_update['CMB'] = current_time
+        append_live_point(st.session_state.live_data, datetime.now(pytz.utc), price)
+
+    # 2. Fetch Bank Rates (Throttled: expired tables are refetched on the pool, the rest is read inline)
+    futures = refresh_bank_tables_in_background(current_time)
+    # Cold start: nothing to show yet, so wait for the first fetches instead of a whole fragment period
+    if futures and not all(cache['table'] for cache in bank_tables.values()):
+        wait(futures, timeout=6)
 
     # 3. Update UI
     
     # Title
-    title_placeholder.title(f"{selected_currency} ({currency_info['name']}) to CNY")
+    st.title(f"{selected_currency} ({currency_info['name']}) to CNY")
 
     # Metrics
-    current_val = price if price else (hist_data['Close'].iloc[-1] if not hist_data.empty else 0)
-    start_val = hist_data['Close'].iloc[0] if not hist_data.empty else current_val
+    known_rates = st.session_state.live_data['rates']
+    last_known = known_rates[-1] if known_rates else (hist_end if hist_close is not None else 0)
+    current_val = price if price else last_known
+    start_val = hist_start if hist_close is not None else current_val
     delta = current_val - start_val
     delta_percent = (delta / start_val) * 100 if start_val != 0 else 0
     
-    boc = st.session_state.bank_rates['BOC']
-    cmb = st.session_state.bank_rates['CMB']
+    boc = bank_tables['BOC']['table'].get(selected_currency)
+    cmb = bank_tables['CMB']['table'].get(selected_currency)
     
-    with metrics_placeholder.container():
-        c1, c2, c3 = st.columns(3)
-        # delta_color="inverse" makes positive delta Red (Up) and negative delta Green (Down)
-        c1.metric("实时汇率 (Yahoo)", f"{current_val:.4f}", f"{delta_percent:.2f}%", delta_color="inverse")
-        c2.metric("中国银行 (卖出价)", f"{boc['spot_sell']}" if boc else "Loading...")
-        c3.metric("招商银行 (卖出价)", f"{cmb['spot_sell']}" if cmb else "Loading...")
+    c1, c2, c3 = st.columns(3)
+    # delta_color="inverse" makes positive delta Red (Up) and negative delta Green (Down)
+    c1.metric("实时汇率 (Yahoo)", f"{current_val:.4f}", f"{delta_percent:.2f}%", delta_color="inverse")
+    c2.metric("中国银行 (卖出价)", f"{boc['spot_sell']}" if boc else "Loading...")
+    c3.metric("招商银行 (卖出价)", f"{cmb['spot_sell']}" if cmb else "Loading...")
 
     # Chart
-    fig = go.Figure()
-    
-    # Determine Colors based on Theme
-    if selected_theme == 'Dark':
-        c_up, c_down = '#ff3333', '#00ff00'
-        f_up, f_down = 'rgba(255, 50, 50, 0.2)', 'rgba(0, 255, 0, 0.2)'
-    elif selected_theme == 'Light':
-        c_up, c_down = '#d62728', '#2ca02c' # Plotly standard red/green
-        f_up, f_down = 'rgba(214, 39, 40, 0.2)', 'rgba(44, 160, 44, 0.2)'
-        
     line_col = c_up if delta >= 0 else c_down
     fill_col = f_up if delta >= 0 else f_down
     
     # Combine History and Live Data into a Single Trace
     # This prevents duplicate hover labels and "jumping" points at the junction
-    plot_times = []
-    plot_rates = []
-    
-    if not hist_data.empty:
-        plot_times.extend(hist_data.index)
-        plot_rates.extend(hist_data['Close'].tolist())
+    plot_times = list(hist_times)
+    plot_rates = list(hist_rates)
         
     # Live Data (already converted to local time)
     live_times_utc = st.session_state.live_data['times']
@@ -370,57 +470,26 @@ while True:
         plot_times.extend(live_times_local)
         plot_rates.extend(live_rates)
         
-    if plot_times:
-        fig.add_trace(go.Scatter(
-            x=plot_times, 
-            y=plot_rates,
-            mode='lines',
-            name='Rate',
-            line=dict(color=line_col, width=2),
-            fill='tozeroy',
-            fillcolor=fill_col
-        ))
-
-    # Calculate dynamic Y-axis range
-    all_rates = []
-    if not hist_data.empty:
-        all_rates.extend(hist_data['Close'].tolist())
-    if st.session_state.live_data['rates']:
-        all_rates.extend(st.session_state.live_data['rates'])
+    # Calculate dynamic Y-axis range (precomputed history extremes + running live extremes)
+    extremes = []
+    if hist_close is not None:
+        extremes.extend((hist_min, hist_max))
+    if live_rates:
+        extremes.extend((st.session_state.live_data['min'], st.session_state.live_data['max']))
     
     y_range = None
-    if all_rates:
-        min_val = min(all_rates)
-        max_val = max(all_rates)
+    if extremes:
+        min_val = min(extremes)
+        max_val = max(extremes)
         y_range = [min_val * 0.999, max_val * 1.001]
 
-    fig.update_layout(
-        title=dict(text=f"<b>Exchange Rate Trend ({selected_range})</b>", font=dict(color=chart_font_color)),
-        xaxis=dict(
-            title="<b>Time</b>", 
-            title_font=dict(color=chart_font_color), 
-            tickfont=dict(color=chart_font_color), 
-            gridcolor=chart_grid,
-            showspikes=True,
-            spikemode='across',
-            spikesnap='cursor',
-            showline=True,
-            spikecolor=chart_font_color,
-            spikethickness=1
-        ),
-        yaxis=dict(title="<b>CNY</b>", title_font=dict(color=chart_font_color), tickfont=dict(color=chart_font_color), range=y_range, tickformat=".4f", gridcolor=chart_grid),
-        showlegend=False,
-        hovermode="x",
-        height=500,
-        template=theme_map[selected_theme],
-        paper_bgcolor=chart_bg,
-        plot_bgcolor=chart_bg,
-        font=dict(color=chart_font_color),
-        margin=dict(l=0, r=0, t=30, b=0),
-        uirevision=f"{selected_currency}_{selected_range}"
-    )
-    chart_placeholder.plotly_chart(fig, width='stretch', key=f"chart_{current_time}")
-    
-    footer_placeholder.caption("Source: Yahoo Finance API & Bank Official Websites/API. © 2025 Jason Cao. Personal Use Only.")
+    # Only the trace data, colors and y-range change between ticks
+    fig = st.session_state.fig
+    with fig.batch_update():
+        fig.data[0].update(x=plot_times, y=plot_rates, line_color=line_col, fillcolor=fill_col)
+        fig.update_yaxes(range=y_range)
+    st.plotly_chart(fig, width='stretch', key="rate_chart")
+
+live_update()
 
-    time.sleep(20)
+st.caption("Source: Yahoo Finance API & Bank Official Websites/API. © 2025 Jason Cao. Personal Use Only.")
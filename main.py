@@ -1,18 +1,24 @@
 import matplotlib.pyplot as plt
-import matplotlib.animation as animation
 import matplotlib.dates as mdates
 from matplotlib.widgets import RadioButtons
+from matplotlib.collections import PolyCollection
 import yfinance as yf
+from yfinance.scrapers.quote import FastInfo
 import pandas as pd
 import seaborn as sns
 from datetime import datetime, timedelta
 import warnings
 import numpy as np
 import requests
-from bs4 import BeautifulSoup
+import orjson
+from requests.adapters import HTTPAdapter
+from lxml import etree, html as lxml_html
+import re
 import threading
+import hashlib
+import queue
 import time
-import bisect
+from numba import njit
 
 # Suppress pandas warnings
 warnings.filterwarnings('ignore')
@@ -21,6 +27,69 @@ warnings.filterwarnings('ignore')
 plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'Arial']
 plt.rcParams['axes.unicode_minus'] = False
 
+@njit(cache=True)
+def nearest_idx(x, target):
+    """Index of the value in sorted x closest to target."""
+    lo = np.searchsorted(x, target)
+    if lo <= 0:
+        return 0
+    if lo >= x.size:
+        return x.size - 1
+    return lo - 1 if (target - x[lo - 1]) < (x[lo] - target) else lo
+
+@njit(cache=True)
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: picks n_out points of (x, y) that keep the line's visual shape."""
+    n = x.size
+    if n_out >= n or n_out < 3:
+        return x, y
+    out_x = np.empty(n_out)
+    out_y = np.empty(n_out)
+    out_x[0] = x[0]
+    out_y[0] = y[0]
+    
+    # First and last points are kept; the rest is split into n_out - 2 buckets
+    every = (n - 2) / (n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        # Third triangle vertex: the average of the next bucket
+        start = int((i + 1) * every) + 1
+        end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[start:end].mean()
+        avg_y = y[start:end].mean()
+        
+        # Keep the point of this bucket that spans the largest triangle with the previous pick
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        max_area = -1.0
+        pick = lo
+        for j in range(lo, hi):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > max_area:
+                max_area = area
+                pick = j
+        out_x[i + 1] = x[pick]
+        out_y[i + 1] = y[pick]
+        a = pick
+    
+    out_x[n_out - 1] = x[n - 1]
+    out_y[n_out - 1] = y[n - 1]
+    return out_x, out_y
+
+@njit(cache=True)
+def compute_stats(hist_y, live_y):
+    """Lowest, first and latest rate over history followed by the live tail (at least one point)."""
+    start = hist_y[0] if hist_y.size else live_y[0]
+    curr = live_y[-1] if live_y.size else hist_y[-1]
+    low = start
+    for v in hist_y:
+        if v < low:
+            low = v
+    for v in live_y:
+        if v < low:
+            low = v
+    return low, start, curr
+
 class BankRateFetcher:
     def __init__(self):
         self.headers = {
@@ -33,32 +102,92 @@ class BankRateFetcher:
             'GBP': '英镑',
             'JPY': '日元'
         }
+        # Keep-alive session shared by the BOC and CMB loops, so polls reuse the TCP/TLS connection
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        self.session.mount("https://www.boc.cn/", adapter)
+        self.session.mount("https://fx.cmbchina.com/", adapter)
+        # Row lookup per currency, matched on the first (name) cell of the BOC table
+        self.boc_row_xpath = {
+            code: etree.XPath(f'//tr[contains(normalize-space(td[1]), "{name}")]')
+            for code, name in self.currency_map.items()
+        }
+        # Same lookup as a byte-level scan of the raw page: the name cell followed by the four rate cells
+        # (the XPath above stays as the fallback for markup this does not match)
+        self.boc_row_re = {
+            code: re.compile(rb'<td[^>]*>[^<]*' + re.escape(name.encode('utf-8')) + rb'[^<]*</td>'
+                             + rb'\s*<td[^>]*>([^<]*)</td>' * 4)
+            for code, name in self.currency_map.items()
+        }
+        # Last response per source ('BOC'/'CMB'): validators for conditional GETs,
+        # a content digest and the parsed payload, so unchanged pages are not parsed again
+        self._last_validators = {}
+        self._last_digest = {}
+        self._last_payload = {}
+
+    def _fetch_parsed(self, source, url, parse, headers=None, timeout=10):
+        """GETs url and returns parse(content), reusing the previous result if the page is unchanged."""
+        headers = dict(headers or {})
+        etag, last_modified = self._last_validators.get(source, (None, None))
+        if source in self._last_payload:
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
+        response = self.session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304:
+            return self._last_payload[source]
+        if response.status_code != 200:
+            return None
+        
+        # Servers without validators: skip the parse when the body hash is unchanged
+        digest = hashlib.blake2b(response.content, digest_size=8).digest()
+        if digest != self._last_digest.get(source):
+            self._last_payload[source] = parse(response.content)
+            self._last_digest[source] = digest
+        self._last_validators[source] = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return self._last_payload[source]
+
+    def _parse_boc_table(self, content):
+        """Builds {currency_code: rates} from the raw BOC page: byte regex first, lxml XPath for rows it misses."""
+        table = {}
+        doc = None
+        for code in self.currency_map:
+            # BOC Columns: Name(0), Spot Buy(1), Cash Buy(2), Spot Sell(3), Cash Sell(4)
+            match = self.boc_row_re[code].search(content)
+            if match:
+                table[code] = {
+                    'spot_sell': match.group(3).decode('utf-8', 'replace').strip(),
+                    'cash_sell': match.group(4).decode('utf-8', 'replace').strip()
+                }
+                continue
+            
+            # Fallback: parse with lxml (raw bytes, charset from the page) once, then jump straight to the row
+            if doc is None:
+                doc = lxml_html.fromstring(content)
+            rows = self.boc_row_xpath[code](doc)
+            if rows:
+                cols = rows[0].findall('td')
+                table[code] = {
+                    'spot_sell': cols[3].text_content().strip(),
+                    'cash_sell': cols[4].text_content().strip()
+                }
+        return table
 
     def get_boc_rates(self, currency_code):
         """Fetches rates from Bank of China."""
         try:
             url = "https://www.boc.cn/sourcedb/whpj/"
-            response = requests.get(url, headers=self.headers, timeout=5)
-            response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
+            if currency_code not in self.currency_map:
+                return None
             
-            target_name = self.currency_map.get(currency_code)
-            if not target_name:
+            # The whole table is the cached payload, so an unchanged page is neither scanned nor parsed again
+            table = self._fetch_parsed('BOC', url, self._parse_boc_table, timeout=5)
+            if table is None:
                 return None
-
-            # Find the table
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cols = row.find_all('td')
-                    if len(cols) > 0 and target_name in cols[0].text.strip():
-                        # BOC Columns: Name(0), Spot Buy(1), Cash Buy(2), Spot Sell(3), Cash Sell(4)
-                        return {
-                            'spot_sell': cols[3].text.strip(),
-                            'cash_sell': cols[4].text.strip()
-                        }
-            return None
+            return table.get(currency_code)
         except Exception as e:
             print(f"BOC Fetch Error: {e}")
             return None
@@ -73,11 +202,10 @@ class BankRateFetcher:
                 'Origin': 'https://fx.cmbchina.com'
             }
             
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code != 200:
+            data = self._fetch_parsed('CMB', url, orjson.loads, headers=headers, timeout=10)
+            if data is None:
                 return None
-                
-            data = response.json()
+            
             target_name = self.currency_map.get(currency_code)
             if not target_name:
                 return None
@@ -137,6 +265,7 @@ class ExchangeRateMonitor:
             'JPY': {'yf': 'JPYCNY=X', 'name': 'Japanese Yen'}
         }
         self.current_currency = 'EUR'
+        self.tickers = {code: yf.Ticker(cfg['yf']) for code, cfg in self.currencies.items()}
         
         # High Resolution History Settings
         self.time_ranges = {
@@ -152,13 +281,32 @@ class ExchangeRateMonitor:
         
         # Data storage
         self.history_data = pd.DataFrame()
-        self.live_times = []
-        self.live_rates = []
+        self._history_cache = {} # {(currency, range): (fetch_time, raw yfinance history)}
+        self._history_cache_ttl = 120
+        self._hist_x = np.empty(0) # History as matplotlib date numbers / rates, fixed until the next fetch
+        self._hist_y = np.empty(0)
+        self._plot_x = np.empty(0) # Full plotted series (history + live); the line itself may be downsampled
+        self._plot_y = np.empty(0)
+        self._ymin = None # Rate extent of the plotted series; the y view only moves when a point leaves it
+        self._ymax = None
+        # Live points as matplotlib date numbers / rates. Keep live buffer reasonable: up to 1 hour
+        # of live data (at 1s interval); the arrays are twice that so the window rarely has to move
+        self.live_capacity = 3600
+        self._live_x = np.empty(2 * self.live_capacity)
+        self._live_y = np.empty(2 * self.live_capacity)
+        self.reset_live_data()
+        self._live_queue = queue.Queue() # (currency, time, rate) from the live rate thread
         self.fill_collection = None
+        self._background = None # Cached canvas pixels without the animated artists (for blitting)
+        self._last_motion_t = 0.0 # Monotonic time of the last handled mouse move
+        self._pending_motion = None # Latest mouse move that arrived too soon; drawn by _motion_timer
+        self._date_labels = {} # Day number -> 'YYYY-MM-DD' for tooltips
+        self._last_frame_end = 0.0 # Monotonic time the last timer frame finished
         
         # Bank Rates
         self.bank_fetcher = BankRateFetcher()
         self.bank_rates = {'BOC': None, 'CMB': None}
+        self._currency_changed = threading.Event() # Wakes the bank thread so it refetches right away
         
         # Setup Figure and Layout
         self.fig = plt.figure(figsize=(14, 8))
@@ -170,16 +318,25 @@ class ExchangeRateMonitor:
         
         # Setup Widgets
         self.setup_widgets()
+        self.start_history_warmup()
         
         # Initial Setup
-        self.apply_theme()
+        self._apply_theme_static()
         self.setup_plot_elements()
+        self._apply_theme_dynamic()
         self.refresh_data()
         self.start_bank_monitoring()
+        self.start_live_monitoring()
         
         # Setup Event Handlers
         self.fig.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
         self.fig.canvas.mpl_connect('axes_leave_event', self.on_mouse_leave)
+        self.fig.canvas.mpl_connect('draw_event', self.on_draw)
+        
+        # One-shot timer that draws the last mouse position held back by the motion throttle
+        self._motion_timer = self.fig.canvas.new_timer(interval=33)
+        self._motion_timer.single_shot = True
+        self._motion_timer.add_callback(self._flush_motion)
 
     def setup_widgets(self):
         """Initialize control widgets."""
@@ -217,7 +374,24 @@ class ExchangeRateMonitor:
         self.fig.text(0.5, 0.005, "© 2025 Jason Cao. Personal Use Only.", 
                       ha='center', va='bottom', fontsize=8, color='#888888', style='italic')
         
-    def apply_theme(self):
+    def _apply_theme_static(self):
+        """One-time styling that does not depend on the theme (labels, grid style, fonts)."""
+        # Axis Labels
+        self.ax.set_xlabel('Time', fontsize=12, fontweight='bold', labelpad=10)
+        self.ax.set_ylabel('Exchange Rate (CNY)', fontsize=12, fontweight='bold', labelpad=10)
+        
+        # Grid
+        self.ax.grid(True, linestyle='--', alpha=0.3)
+        
+        # Keep references to everything a theme change recolors
+        self._theme_spines = list(self.ax.spines.values())
+        self._theme_widget_axes = [self.ax_currency, self.ax_range, self.ax_theme]
+        self._theme_radio_labels = [label for radio in [self.radio_currency, self.radio_range, self.radio_theme]
+                                    for label in radio.labels]
+        for label in self._theme_radio_labels:
+            label.set_fontsize(9)
+
+    def _apply_theme_dynamic(self):
         """Applies the current theme colors to all elements."""
         theme = self.themes[self.current_theme]
         
@@ -225,65 +399,64 @@ class ExchangeRateMonitor:
         self.fig.patch.set_facecolor(theme['bg'])
         self.ax.set_facecolor(theme['bg'])
         
-        # Axis Labels and Ticks
-        self.ax.set_xlabel('Time', fontsize=12, fontweight='bold', color=theme['fg'], labelpad=10)
-        self.ax.set_ylabel('Exchange Rate (CNY)', fontsize=12, fontweight='bold', color=theme['fg'], labelpad=10)
-        self.ax.tick_params(axis='both', colors=theme['fg'])
+        # Axis Labels, Ticks and Grid
+        self.ax.xaxis.label.set_color(theme['fg'])
+        self.ax.yaxis.label.set_color(theme['fg'])
+        self.ax.tick_params(axis='both', colors=theme['fg'], grid_color=theme['grid'])
         
-        # Grid and Spines
-        self.ax.grid(True, linestyle='--', alpha=0.3, color=theme['grid'])
-        for spine in self.ax.spines.values():
+        # Spines
+        for spine in self._theme_spines:
             spine.set_color(theme['grid'])
             
         # Widget Styling
-        for ax_widget in [self.ax_currency, self.ax_range, self.ax_theme]:
+        for ax_widget in self._theme_widget_axes:
             ax_widget.set_facecolor(theme['widget_bg'])
             ax_widget.title.set_color(theme['widget_fg'])
             
         # Bank Text
-        if hasattr(self, 'bank_text'):
-            self.bank_text.set_color(theme['fg'])
+        self.bank_text.set_color(theme['fg'])
             
         # Radio Button Labels
-        for radio in [self.radio_currency, self.radio_range, self.radio_theme]:
-            for label in radio.labels:
-                label.set_color(theme['widget_fg'])
-                label.set_fontsize(9)
-                
-        # Update existing lines if they exist
-        if hasattr(self, 'history_line'):
-            pass
+        for label in self._theme_radio_labels:
+            label.set_color(theme['widget_fg'])
 
         # Update Tooltip Theme
-        if hasattr(self, 'tooltip'):
-            self.tooltip.get_bbox_patch().set_facecolor(theme['hover_bg'])
-            self.tooltip.get_bbox_patch().set_edgecolor(theme['hover_fg'])
-            self.tooltip.set_color(theme['hover_fg'])
+        self.tooltip.get_bbox_patch().set_facecolor(theme['hover_bg'])
+        self.tooltip.get_bbox_patch().set_edgecolor(theme['hover_fg'])
+        self.tooltip.set_color(theme['hover_fg'])
             
         # Update V-Line Theme
-        if hasattr(self, 'v_line'):
-            self.v_line.set_color(theme['fg'])
-
-        self.fig.canvas.draw_idle()
+        self.v_line.set_color(theme['fg'])
 
     def setup_plot_elements(self):
         """Initialize plot lines and legend."""
         theme = self.themes[self.current_theme]
         
+        # Data reaches the axes as float date numbers only, so date ticks have to be requested explicitly
+        self.ax.xaxis.set_major_locator(mdates.AutoDateLocator())
         self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
         
-        # Initialize Lines
+        # Initialize Lines (animated: drawn by blitting, not by full canvas redraws)
         self.live_line, = self.ax.plot([], [], '-', color=theme['live_line_base'], 
-                                       label='Rate', linewidth=1.5)
+                                       label='Rate', linewidth=1.5, animated=True)
         
-        # Vertical line for cursor (Crosshair)
-        self.v_line = self.ax.axvline(x=0, color=theme['fg'], linestyle='--', alpha=0.5, visible=False)
+        # Title as an animated artist so the per-frame text change does not need a full redraw
+        self.title_artist = self.ax.text(0.5, 1.01, '', transform=self.ax.transAxes, ha='center', va='bottom',
+                                         fontsize=12, fontweight='bold', animated=True)
+        
+        # Fill under the line; its polygon is updated in place every frame
+        self.fill_collection = PolyCollection([], alpha=0.15, animated=True)
+        self.ax.add_collection(self.fill_collection, autolim=False)
+        
+        # Vertical line for cursor (Crosshair); the hover overlay is blitted like the live line
+        self.v_line = self.ax.axvline(x=0, color=theme['fg'], linestyle='--', alpha=0.5, visible=False,
+                                      animated=True)
         
         # Tooltip annotation
         self.tooltip = self.ax.annotate(
             '', xy=(0, 0), xytext=(10, 10), textcoords='offset points',
             bbox=dict(boxstyle="round,pad=0.5", fc=theme['hover_bg'], ec=theme['hover_fg'], alpha=0.9),
-            color=theme['hover_fg'], visible=False
+            color=theme['hover_fg'], visible=False, animated=True
         )
         
         self.legend = None
@@ -296,86 +469,123 @@ class ExchangeRateMonitor:
         """Callback for currency change."""
         self.current_currency = label
         print(f"Switched to {label}")
-        self.live_times = []
-        self.live_rates = []
+        self.reset_live_data()
         self.refresh_data()
-        # Bank updates are handled by background loops monitoring self.current_currency
+        # Bank updates are handled by the background loop; wake it for the new currency
+        self._currency_changed.set()
 
     def change_range(self, label):
         """Callback for time range change."""
         self.current_range = label
         print(f"Switched to {label} range")
-        self.live_times = []
-        self.live_rates = []
+        self.reset_live_data()
         self.refresh_data()
         
     def change_theme(self, label):
         """Callback for theme change."""
         self.current_theme = label
         print(f"Switched to {label} theme")
-        self.apply_theme()
-        # Re-trigger visual update to ensure line colors match theme if neutral, 
-        # or just let the next update loop handle it.
+        self._apply_theme_dynamic()
+        # The radio buttons only blit themselves; the new colors need one full redraw
+        # (which also re-caches the blitting background)
+        self.fig.canvas.draw_idle()
+        
+    def reset_live_data(self):
+        """Clears the live buffers (the preallocated arrays are reused)."""
+        self._live_start = 0
+        self._live_end = 0
+
+    def append_live_point(self, x, rate):
+        """Appends one live point, dropping the oldest once live_capacity points are held."""
+        if self._live_end == self._live_x.size:
+            # End of the arrays: move the current window back to the front
+            count = self._live_end - self._live_start
+            self._live_x[:count] = self._live_x[self._live_start:self._live_end]
+            self._live_y[:count] = self._live_y[self._live_start:self._live_end]
+            self._live_start, self._live_end = 0, count
+        self._live_x[self._live_end] = x
+        self._live_y[self._live_end] = rate
+        self._live_end += 1
+        if self._live_end - self._live_start > self.live_capacity:
+            self._live_start += 1
         
     def refresh_data(self):
         """Refreshes history and resets plot."""
         self.fetch_history()
-        self.update_visuals(0, 0) # Reset visuals
-        self.ax.relim()
-        self.ax.autoscale_view()
+        # Put the new history on the line right away so the view below fits it
+        self.set_line_data(self._hist_x, self._hist_y)
+        low = compute_stats(self._hist_y, self._live_y[:0])[0] if len(self._hist_y) else None
+        self.update_visuals(0, 0, low) # Reset visuals
+        self.fit_view()
         self.fig.canvas.draw_idle()
 
-    def start_bank_monitoring(self):
-        """Starts background threads for periodic bank rate updates."""
-        def run_boc_loop():
-            last_currency = None
-            while True:
-                current = self.current_currency
-                # If currency changed, reset display immediately
-                if current != last_currency:
-                    self.bank_rates['BOC'] = None
-                    self.update_bank_text()
-                    last_currency = current
-                
-                try:
-                    rate = self.bank_fetcher.get_boc_rates(current)
-                    if self.current_currency == current:
-                        self.bank_rates['BOC'] = rate
-                        self.update_bank_text()
-                except Exception as e:
-                    print(f"BOC loop error: {e}")
-                
-                # Sleep 30s, check for change every 0.5s
-                for _ in range(60):
-                    if self.current_currency != current:
-                        break
-                    time.sleep(0.5)
+    def _y_limits(self, lo, hi):
+        """View limits for rates in [lo, hi]: a 5% margin, at least 0.05% of the rate for flat data."""
+        pad = max((hi - lo) * 0.05, abs(hi) * 0.0005)
+        return lo - pad, hi + pad
+
+    def fit_view(self):
+        """Sets the view limits explicitly from the full series (no relim/autoscale scan over the artists)."""
+        if len(self._plot_x) == 0:
+            self._ymin = self._ymax = None
+            return
+        x0, x1 = self._plot_x[0], self._plot_x[-1]
+        x_pad = max((x1 - x0) * 0.05, 1 / 1440) # At least a minute
+        self._ymin, self._ymax = self._plot_y.min(), self._plot_y.max()
+        self.ax.set_xlim(x0 - x_pad, x1 + x_pad)
+        self.ax.set_ylim(*self._y_limits(self._ymin, self._ymax))
+
+    def extend_view(self, x, low, high):
+        """Grows the view just enough (plus margin) to show new points up to x with rates in [low, high]."""
+        if self._ymin is None:
+            self.fit_view()
+            return
+        xmin, xmax = self.ax.get_xlim()
+        if x > xmax:
+            self.ax.set_xlim(xmin, x + (x - xmin) * 0.05)
+        if low < self._ymin or high > self._ymax:
+            self._ymin = min(self._ymin, low)
+            self._ymax = max(self._ymax, high)
+            self.ax.set_ylim(*self._y_limits(self._ymin, self._ymax))
 
-        def run_cmb_loop():
+    def start_bank_monitoring(self):
+        """Starts a background thread for periodic bank rate updates."""
+        def run_bank_loop():
+            # Source -> (fetch function, refresh interval in seconds)
+            sources = {
+                'BOC': (self.bank_fetcher.get_boc_rates, 30),
+                'CMB': (self.bank_fetcher.get_cmb_rates, 20)
+            }
+            next_due = dict.fromkeys(sources, 0.0)
             last_currency = None
             while True:
                 current = self.current_currency
+                # If currency changed, reset display immediately and refetch every source
                 if current != last_currency:
-                    self.bank_rates['CMB'] = None
+                    for source in sources:
+                        self.bank_rates[source] = None
+                        next_due[source] = 0.0
                     self.update_bank_text()
                     last_currency = current
                 
-                try:
-                    rate = self.bank_fetcher.get_cmb_rates(current)
-                    if self.current_currency == current:
-                        self.bank_rates['CMB'] = rate
-                        self.update_bank_text()
-                except Exception as e:
-                    print(f"CMB loop error: {e}")
+                for source, (fetch, interval) in sources.items():
+                    if time.monotonic() < next_due[source]:
+                        continue
+                    try:
+                        rate = fetch(current)
+                        if self.current_currency == current:
+                            self.bank_rates[source] = rate
+                            self.update_bank_text()
+                    except Exception as e:
+                        print(f"{source} loop error: {e}")
+                    next_due[source] = time.monotonic() + interval
                 
-                # Sleep 20s, check for change every 0.5s
-                for _ in range(40):
-                    if self.current_currency != current:
-                        break
-                    time.sleep(0.5)
+                # Block until the next source is due, or until change_currency wakes us
+                timeout = max(0.0, min(next_due.values()) - time.monotonic())
+                if self._currency_changed.wait(timeout):
+                    self._currency_changed.clear()
 
-        threading.Thread(target=run_boc_loop, daemon=True).start()
-        threading.Thread(target=run_cmb_loop, daemon=True).start()
+        threading.Thread(target=run_bank_loop, daemon=True).start()
 
     def update_bank_text(self):
         """Updates the bank rate text widget."""
@@ -405,20 +615,27 @@ class ExchangeRateMonitor:
         cfg = self.time_ranges[self.current_range]
         ticker_symbol = self.currencies[self.current_currency]['yf']
         
-        print(f"Fetching {self.current_range} history for {ticker_symbol}...")
+        key = (self.current_currency, self.current_range)
         
         try:
-            ticker = yf.Ticker(ticker_symbol)
-            hist = ticker.history(period=cfg['yf_period'], interval=cfg['yf_interval'])
+            # Serve recent downloads (including the startup warmup) from memory
+            cached = self._history_cache.get(key)
+            if cached and time.time() - cached[0] < self._history_cache_ttl:
+                hist = cached[1]
+            else:
+                print(f"Fetching {self.current_range} history for {ticker_symbol}...")
+                hist = self.tickers[self.current_currency].history(period=cfg['yf_period'], interval=cfg['yf_interval'])
+                if not hist.empty:
+                    self._history_cache[key] = (time.time(), hist)
             
             if not hist.empty:
-                # Timezone conversion
+                # Timezone conversion (on a new frame, the cached one stays as downloaded)
                 local_tz = datetime.now().astimezone().tzinfo
-                hist.index = hist.index.tz_convert(local_tz).tz_localize(None)
+                hist = hist.tz_convert(local_tz).tz_localize(None)
                 
-                # Filter by hours
+                # Filter by hours (index is sorted, so slice from the cutoff instead of masking)
                 cutoff_time = datetime.now() - timedelta(hours=cfg['hours'])
-                self.history_data = hist[hist.index >= cutoff_time]
+                self.history_data = hist.iloc[hist.index.searchsorted(cutoff_time):]
                 
                 # Update Line (Handled in update loop now)
             else:
@@ -427,14 +644,63 @@ class ExchangeRateMonitor:
         except Exception as e:
             print(f"Error fetching history: {e}")
             self.history_data = pd.DataFrame()
+        
+        # Convert once here so frames only append the live tail
+        if not self.history_data.empty:
+            self._hist_x = mdates.date2num(self.history_data.index.to_numpy())
+            self._hist_y = self.history_data['Close'].to_numpy(dtype=np.float64, copy=False)
+        else:
+            self._hist_x = np.empty(0)
+            self._hist_y = np.empty(0)
+
+    def start_history_warmup(self):
+        """Downloads the current range for the other currencies in one batched request, so switching is instant."""
+        range_label = self.current_range
+        # refresh_data() fetches the current currency right away, so leave it out of the batch
+        symbols = {c['yf']: code for code, c in self.currencies.items() if code != self.current_currency}
+        
+        def run_warmup():
+            cfg = self.time_ranges[range_label]
+            try:
+                data = yf.download(tickers=list(symbols), period=cfg['yf_period'], interval=cfg['yf_interval'],
+                                   threads=True, progress=False, group_by='ticker', ignore_tz=False)
+            except Exception as e:
+                print(f"History warmup error: {e}")
+                return
+            if data is None or data.empty:
+                return
+            
+            fetch_time = time.time()
+            downloaded = set(data.columns.get_level_values(0))
+            for symbol, code in symbols.items():
+                if symbol not in downloaded:
+                    continue
+                # Rows are the union of all symbols' timestamps; keep this symbol's own bars
+                hist = data[symbol].dropna(subset=['Close'])
+                if not hist.empty:
+                    self._history_cache.setdefault((code, range_label), (fetch_time, hist))
+
+        threading.Thread(target=run_warmup, daemon=True).start()
+
+    def start_live_monitoring(self):
+        """Starts a background thread that polls the live rate, so the GUI thread never waits on the network."""
+        def run_live_loop():
+            while True:
+                current = self.current_currency
+                rate = self.get_live_rate(current)
+                if rate is not None:
+                    self._live_queue.put((current, datetime.now(), rate))
+                time.sleep(self.update_interval)
+
+        threading.Thread(target=run_live_loop, daemon=True).start()
 
-    def get_live_rate(self):
+    def get_live_rate(self, currency_code):
         """Fetches current rate using yfinance API."""
-        ticker_symbol = self.currencies[self.current_currency]['yf']
         try:
-            ticker = yf.Ticker(ticker_symbol)
-            # Try fast_info first (faster, less data overhead)
-            price = ticker.fast_info.last_price
+            ticker = self.tickers[currency_code]
+            # Try fast_info first (faster, less data overhead).
+            # A fresh FastInfo per call: Ticker.fast_info memoizes last_price on the cached Ticker
+            price = FastInfo(ticker).last_price
             
             # Fallback if fast_info fails
             if price is None or np.isnan(price):
@@ -451,72 +717,62 @@ class ExchangeRateMonitor:
 
     def on_mouse_leave(self, event):
         """Hide cursor elements when mouse leaves axes."""
+        self._pending_motion = None
         self.v_line.set_visible(False)
         self.tooltip.set_visible(False)
-        self.fig.canvas.draw_idle()
+        self.blit()
+
+    def format_time_label(self, x):
+        """Formats a date number as '%Y-%m-%d %H:%M:%S': cached date part, time of day by arithmetic."""
+        # Whole seconds since the epoch (the epsilon absorbs float error on exact seconds)
+        day, secs = divmod(int(x * 86400 + 1e-6), 86400)
+        date_label = self._date_labels.get(day)
+        if date_label is None:
+            date_label = self._date_labels[day] = mdates.num2date(day).strftime('%Y-%m-%d')
+        hours, rem = divmod(secs, 3600)
+        return f"{date_label} {hours:02d}:{rem // 60:02d}:{rem % 60:02d}"
 
     def on_mouse_move(self, event):
         """Handle mouse movement to update vertical line and tooltip."""
-        if not event.inaxes == self.ax:
-            return
-            
-        # Get data from the line
-        x_data = self.live_line.get_xdata()
-        y_data = self.live_line.get_ydata()
-        
-        if len(x_data) == 0:
+        # Coalesce motion events to ~30 fps; the mouse can fire far more often than we can redraw.
+        # Events that come too soon are held (latest wins) and drawn once the interval is up
+        t = time.monotonic()
+        if t - self._last_motion_t < 0.033:
+            if self._pending_motion is None:
+                self._motion_timer.start()
+            self._pending_motion = event
             return
+        self._pending_motion = None
+        self._last_motion_t = t
+        self.show_hover(event)
 
-        # Convert event x to datetime (naive) for comparison if needed
-        try:
-            mouse_date = mdates.num2date(event.xdata).replace(tzinfo=None)
-        except:
+    def _flush_motion(self):
+        """Draws the mouse position held back by the throttle, so the final position always shows."""
+        event = self._pending_motion
+        if event is None:
             return
+        self._pending_motion = None
+        self._last_motion_t = time.monotonic()
+        self.show_hover(event)
 
-        # Find nearest index
-        # x_data usually contains floats (matplotlib dates) if plotted via plot_date or similar,
-        # but since we used set_data with datetimes, let's check.
-        # Matplotlib converts to float internally. get_xdata() usually returns what is stored.
-        # If set_data was used with datetimes, x_data is likely datetimes.
+    def show_hover(self, event):
+        """Moves the vertical line and tooltip to the data point nearest the mouse."""
+        if not event.inaxes == self.ax:
+            return
+            
+        # Look up in the full series (float64 matplotlib date numbers), not the downsampled line
+        x_data = self._plot_x
+        y_data = self._plot_y
         
-        target = mouse_date
-        if len(x_data) > 0 and isinstance(x_data[0], (float, np.floating)):
-             target = event.xdata
+        if len(x_data) == 0 or event.xdata is None:
+            return
 
-        # Use bisect for fast search
-        if isinstance(x_data, np.ndarray):
-            idx = np.searchsorted(x_data, target)
-        else:
-            idx = bisect.bisect_left(x_data, target)
-            
-        # Check neighbors to find closest
-        if idx >= len(x_data):
-            idx = len(x_data) - 1
-        elif idx > 0:
-            curr_val = x_data[idx]
-            prev_val = x_data[idx-1]
-            
-            if isinstance(target, (float, np.floating)):
-                d1 = abs(curr_val - target)
-                d2 = abs(prev_val - target)
-            else:
-                d1 = abs((curr_val - target).total_seconds())
-                d2 = abs((prev_val - target).total_seconds())
-                
-            if d2 < d1:
-                idx = idx - 1
-                
-        nearest_x = x_data[idx]
+        idx = nearest_idx(x_data, event.xdata)
+        vline_x = x_data[idx]
         nearest_y = y_data[idx]
+        date_str = self.format_time_label(vline_x)
         
         # Update Vertical Line
-        if isinstance(nearest_x, (float, np.floating)):
-            vline_x = nearest_x
-            date_str = mdates.num2date(nearest_x).strftime('%Y-%m-%d %H:%M:%S')
-        else:
-            vline_x = mdates.date2num(nearest_x)
-            date_str = nearest_x.strftime('%Y-%m-%d %H:%M:%S')
-            
         self.v_line.set_xdata([vline_x, vline_x])
         self.v_line.set_visible(True)
         
@@ -525,10 +781,20 @@ class ExchangeRateMonitor:
         self.tooltip.set_text(f"Time: {date_str}\nRate: {nearest_y:.4f}")
         self.tooltip.set_visible(True)
         
-        self.fig.canvas.draw_idle()
+        self.blit()
+
+    def set_line_data(self, x, y):
+        """Keeps the full series for hover lookup and plots it downsampled to the axes pixel width."""
+        self._plot_x = x
+        self._plot_y = y
+        # More points than pixels only stacks overlapping segments
+        n_pixels = int(self.ax.bbox.width)
+        if len(x) > 2 * n_pixels:
+            x, y = lttb(x, y, n_pixels)
+        self.live_line.set_data(x, y)
 
-    def update_visuals(self, change, pct_change):
-        """Updates colors and fills."""
+    def update_visuals(self, change, pct_change, low=None):
+        """Updates colors and fills; low is the lowest plotted rate (None when nothing is plotted)."""
         if change >= 0:
             color = '#ff3333' # Red
             symbol = '▲'
@@ -538,79 +804,104 @@ class ExchangeRateMonitor:
             
         self.live_line.set_color(color)
         
-        # Fill
-        if self.fill_collection:
-            self.fill_collection.remove()
-            
-        # Combine data
-        all_times = []
-        all_rates = []
-        if not self.history_data.empty:
-            all_times.extend(self.history_data.index)
-            all_rates.extend(self.history_data['Close'].values)
-            
-        all_times.extend(self.live_times)
-        all_rates.extend(self.live_rates)
-        
-        if all_times:
-            self.fill_collection = self.ax.fill_between(
-                all_times, all_rates, min(all_rates)*0.999, color=color, alpha=0.15
-            )
+        # Fill: reshape the existing polygon (line, then back along the baseline) instead of a new fill_between
+        x, y = self.live_line.get_data()
+        if len(x) and low is not None:
+            baseline = low * 0.999
+            verts = np.vstack([np.column_stack([x, y]), [[x[-1], baseline], [x[0], baseline]]])
+            self.fill_collection.set_verts([verts])
+        else:
+            self.fill_collection.set_verts([])
+        self.fill_collection.set_color(color)
             
         return symbol, color
 
-    def update(self, frame):
+    def update(self):
         """Animation loop."""
-        current_rate = self.get_live_rate()
-        current_time = datetime.now()
+        # Take whatever the live rate thread has delivered since the last frame (no network here)
+        current_rate = None
+        tick_low = tick_high = None # Rate range of every point taken this frame, not just the last
+        while True:
+            try:
+                currency, t, rate = self._live_queue.get_nowait()
+            except queue.Empty:
+                break
+            if currency == self.current_currency:
+                # One scalar conversion per point; the buffers hold date numbers
+                current_x, current_rate = mdates.date2num(t), rate
+                self.append_live_point(current_x, rate)
+                tick_low = rate if tick_low is None else min(tick_low, rate)
+                tick_high = rate if tick_high is None else max(tick_high, rate)
         
         if current_rate is not None:
-            self.live_times.append(current_time)
-            self.live_rates.append(current_rate)
-            
-            # Keep live buffer reasonable
-            if len(self.live_times) > 3600: # Store up to 1 hour of live data (at 1s interval)
-                self.live_times.pop(0)
-                self.live_rates.pop(0)
+            # Combine History and Live Data (cached history arrays + live tail)
+            live = slice(self._live_start, self._live_end)
+            live_y = self._live_y[live]
+            self.set_line_data(np.concatenate([self._hist_x, self._live_x[live]]),
+                               np.concatenate([self._hist_y, live_y]))
             
-            # Combine History and Live Data
-            all_times = []
-            all_rates = []
+            # Calculate change based on visible history (start of the range to the latest rate)
+            low, start_rate, current_rate = compute_stats(self._hist_y, live_y)
+            change = current_rate - start_rate
+            pct_change = (change / start_rate) * 100
             
-            if not self.history_data.empty:
-                all_times.extend(self.history_data.index)
-                all_rates.extend(self.history_data['Close'].values)
-            
-            all_times.extend(self.live_times)
-            all_rates.extend(self.live_rates)
-            
-            self.live_line.set_data(all_times, all_rates)
-            
-            # Calculate change based on visible history
-            change = 0
-            pct_change = 0
-            if not self.history_data.empty:
-                start_rate = self.history_data['Close'].iloc[0]
-                change = current_rate - start_rate
-                pct_change = (change / start_rate) * 100
-            
-            symbol, color = self.update_visuals(change, pct_change)
+            symbol, color = self.update_visuals(change, pct_change, low)
             
             # Update Title
             currency_name = self.currencies[self.current_currency]['name']
             title = (f"{currency_name} ({self.current_currency}) to CNY | Current: {current_rate:.4f} | "
                      f"Change ({self.current_range}): {symbol} {abs(pct_change):.2f}%")
             
-            self.ax.set_title(title, fontsize=12, fontweight='bold', color=color)
+            self.title_artist.set_text(title)
+            self.title_artist.set_color(color)
             
-            self.ax.relim()
-            self.ax.autoscale_view()
+            # Move the limits (full redraw) only when a new point leaves the current view, otherwise blit
+            xmin, xmax = self.ax.get_xlim()
+            ymin, ymax = self.ax.get_ylim()
+            if xmin <= current_x <= xmax and ymin <= tick_low and tick_high <= ymax:
+                self.blit()
+            else:
+                self.extend_view(current_x, tick_low, tick_high)
+                self.fig.canvas.draw_idle()
 
-        return self.live_line,
+    def _tick(self):
+        """Timer callback: skips a frame that fires right after a slow one finished (skip-if-behind)."""
+        # A frame that overran its interval makes the next tick fire at once; skipping it leaves the
+        # GUI loop at least half an interval for input and redraws before the next frame
+        if time.monotonic() - self._last_frame_end < self.update_interval * 0.5:
+            return
+        try:
+            self.update()
+        finally:
+            self._last_frame_end = time.monotonic()
+
+    def on_draw(self, event):
+        """Caches the background after every full redraw and puts the animated artists back on top."""
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        """Draws the animated artists onto the canvas."""
+        # Hidden artists (crosshair/tooltip when not hovering) draw nothing
+        for artist in (self.fill_collection, self.live_line, self.title_artist, self.v_line, self.tooltip):
+            self.fig.draw_artist(artist)
+
+    def blit(self):
+        """Restores the cached background and redraws only the animated artists."""
+        if self._background is None:
+            self.fig.canvas.draw_idle()
+            return
+        self.fig.canvas.restore_region(self._background)
+        self.draw_animated()
+        self.fig.canvas.blit(self.fig.bbox)
 
     def start(self):
         print("Starting monitor...")
-        ani = animation.FuncAnimation(self.fig, self.update, interval=self.update_interval*1000, cache_frame_data=False)
+        # Plain canvas timer instead of FuncAnimation: its built-in blitting only caches the axes
+        # area (the title sits above it) and is not refreshed by full redraws (theme, bank text)
+        self.timer = self.fig.canvas.new_timer(interval=self.update_interval*1000)
+        self.timer.add_callback(self._tick)
+        self.timer.start()
         plt.show()
 
 if __name__ == "__main__":